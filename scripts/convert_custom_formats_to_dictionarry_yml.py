@@ -4,7 +4,10 @@ Convert TRaSH-style custom format YAML to Dictionarry/Profilarr schema:
   name, description, tags, conditions (with type + type-specific fields), tests
 Run from repository root. Overwrites custom_formats/*.yml in place.
 """
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import os
+import re
 import sys
 
 try:
@@ -13,9 +16,25 @@ except ImportError:
     print("PyYAML required: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 CUSTOM_FORMATS_DIR = REPO_ROOT / "custom_formats"
 
+# Top-level block "conditions:" key, matched on the raw file bytes
+_RE_CONDITIONS = re.compile(rb'(?m)^conditions:[ \t]*(#.*)?\r?$')
+
+YAML_WIDTH = 120
+_RE_SIMPLE_KEY = re.compile(r'[a-z_]+')
+# Characters the emitter writes as-is with allow_unicode (no line breaks)
+_RE_PRINTABLE = re.compile(r'[\x20-\x7e\xa0-\u2027\u202a-\ud7ff\ue000-\ufefe\uff00-\ufffd]*')
+
+_STR_TAG = "tag:yaml.org,2002:str"
+_RESOLVER = yaml.resolver.Resolver()
+
 # TRaSH ResolutionSpecification value (int) -> Dictionarry resolution string
 RESOLUTION_MAP = {
     360: "360p",
@@ -41,6 +60,120 @@ SOURCE_MAP = {
 }
 
 
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Atomically replace path with data (written to a .tmp sibling, then renamed)."""
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def _is_simple_key(key) -> bool:
+    return (
+        type(key) is str
+        and _RE_SIMPLE_KEY.fullmatch(key) is not None
+        and _RESOLVER.resolve(yaml.ScalarNode, key, (True, False)) == _STR_TAG
+    )
+
+
+def _is_plain(value: str) -> bool:
+    """Whether the emitter would write value as a plain (unquoted) scalar."""
+    if _RESOLVER.resolve(yaml.ScalarNode, value, (True, False)) != _STR_TAG:
+        return False
+    if value[0] == " " or value[-1] == " " or value.startswith(("---", "...")):
+        return False
+    if value[0] in "#,[]{}&*!|>'\"%@`":
+        return False
+    if value[0] in "-?:" and (len(value) == 1 or value[1] == " "):
+        return False
+    return ": " not in value and " #" not in value and not value.endswith(":")
+
+
+def _yaml_scalar(value, column: int) -> str | None:
+    """Render value as the emitter would starting at column, or None if unsure."""
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "null"
+    if type(value) is int:
+        return str(value)
+    if type(value) is not str or _RE_PRINTABLE.fullmatch(value) is None:
+        return None
+    text = value if _is_plain(value) else "'" + value.replace("'", "''") + "'"
+    # Past the width the emitter may fold the line at a space
+    if column + len(text) > YAML_WIDTH and " " in text:
+        return None
+    return text
+
+
+def _dump_simple(data: dict) -> bytes | None:
+    """Emit data exactly as yaml.dump with this repo's options would.
+
+    Handles the fixed Dictionarry shapes only: a mapping whose values are
+    scalars, lists of scalars or lists of flat mappings. Returns None for
+    anything else so the caller can fall back to yaml.dump.
+    """
+    if type(data) is not dict or not data:
+        return None
+    lines = []
+    for key, value in data.items():
+        if not _is_simple_key(key):
+            return None
+        if type(value) is not list:
+            text = _yaml_scalar(value, len(key) + 2)
+            if text is None:
+                return None
+            lines.append(f"{key}: {text}")
+            continue
+        if not value:
+            lines.append(f"{key}: []")
+            continue
+        lines.append(f"{key}:")
+        for item in value:
+            if type(item) is not dict:
+                text = _yaml_scalar(item, 2)
+                if text is None:
+                    return None
+                lines.append(f"- {text}")
+                continue
+            if not item:
+                return None
+            prefix = "- "
+            for k, v in item.items():
+                text = _yaml_scalar(v, len(prefix) + len(k) + 2) if _is_simple_key(k) else None
+                if text is None:
+                    return None
+                lines.append(f"{prefix}{k}: {text}")
+                prefix = "  "
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def map_resolution(value) -> str:
+    return RESOLUTION_MAP.get(int(value), f"{value}p") if isinstance(value, int) else str(value)
+
+
+def map_source(value) -> str:
+    return SOURCE_MAP.get(int(value), "unknown") if isinstance(value, int) else str(value)
+
+
+# TRaSH implementation -> (Dictionarry condition type, value field, value mapper).
+# Unknown implementations become a generic release_title pattern.
+IMPLEMENTATION_MAP = {
+    "ResolutionSpecification": ("resolution", "resolution", map_resolution),
+    "SourceSpecification": ("source", "source", map_source),
+    "ReleaseGroupSpecification": ("release_group", "pattern", str),
+    "ReleaseTitleSpecification": ("release_title", "pattern", str),
+}
+DEFAULT_IMPLEMENTATION = ("release_title", "pattern", str)
+
+
 def spec_to_condition(spec: dict) -> dict | None:
     impl = spec.get("implementation")
     name = spec.get("name", "")
@@ -48,65 +181,23 @@ def spec_to_condition(spec: dict) -> dict | None:
     required = spec.get("required", False)
     fields = spec.get("fields") or {}
     value = fields.get("value")
+    if value is None:
+        return None
 
-    if impl == "ResolutionSpecification" and value is not None:
-        res_str = (
-            RESOLUTION_MAP.get(int(value), f"{value}p")
-            if isinstance(value, int)
-            else str(value)
-        )
-        return {
-            "name": name,
-            "negate": negate,
-            "required": required,
-            "type": "resolution",
-            "resolution": res_str,
-        }
-    if impl == "SourceSpecification" and value is not None:
-        src_str = SOURCE_MAP.get(int(value), "unknown") if isinstance(value, int) else str(value)
-        return {
-            "name": name,
-            "negate": negate,
-            "required": required,
-            "type": "source",
-            "source": src_str,
-        }
-    if impl == "ReleaseGroupSpecification" and value is not None:
-        return {
-            "name": name,
-            "negate": negate,
-            "required": required,
-            "type": "release_group",
-            "pattern": str(value),
-        }
-    if impl == "ReleaseTitleSpecification" and value is not None:
-        return {
-            "name": name,
-            "negate": negate,
-            "required": required,
-            "type": "release_title",
-            "pattern": str(value),
-        }
-    # Unknown implementation: keep as generic condition with pattern if possible
-    if value is not None:
-        return {
-            "name": name,
-            "negate": negate,
-            "required": required,
-            "type": "release_title",
-            "pattern": str(value),
-        }
-    return None
+    cond_type, field, mapper = IMPLEMENTATION_MAP.get(impl, DEFAULT_IMPLEMENTATION)
+    return {
+        "name": name,
+        "negate": negate,
+        "required": required,
+        "type": cond_type,
+        field: mapper(value),
+    }
 
 
 def convert_cf(trash_cf: dict) -> dict:
     name = trash_cf.get("name", "Unnamed")
     specifications = trash_cf.get("specifications") or []
-    conditions = []
-    for spec in specifications:
-        cond = spec_to_condition(spec)
-        if cond:
-            conditions.append(cond)
+    conditions = [cond for cond in map(spec_to_condition, specifications) if cond]
 
     description = trash_cf.get("description") or f"Matches release criteria for {name}"
     tags = trash_cf.get("tags")
@@ -122,32 +213,59 @@ def convert_cf(trash_cf: dict) -> dict:
     }
 
 
-def main() -> None:
-    if not CUSTOM_FORMATS_DIR.is_dir():
-        print(f"Directory not found: {CUSTOM_FORMATS_DIR}", file=sys.stderr)
-        sys.exit(1)
+def convert_file(yml_path: Path) -> tuple[bytes | None, str | None]:
+    """Convert one custom format file.
 
-    count = 0
-    for yml_path in sorted(CUSTOM_FORMATS_DIR.glob("*.yml")):
-        try:
-            data = yaml.safe_load(yml_path.read_text(encoding="utf-8"))
-            if not data:
-                continue
-            # Skip if already in Dictionarry format (has top-level "conditions")
-            if "conditions" in data and "specifications" not in data:
-                continue
-            out = convert_cf(data)
-            yaml_str = yaml.dump(
+    Returns:
+        (yaml_bytes, error): yaml_bytes is None when the file is skipped or fails.
+    """
+    try:
+        buf = yml_path.read_bytes()
+        # Already in Dictionarry format: decide from the bytes without parsing.
+        # Any mention of "specifications" means the file needs a real look.
+        if b"specifications" not in buf and _RE_CONDITIONS.search(buf):
+            return None, None
+        data = yaml.load(buf, Loader=SafeLoader)
+        if not data:
+            return None, None
+        # Skip if already in Dictionarry format (has top-level "conditions")
+        if "conditions" in data and "specifications" not in data:
+            return None, None
+        out = convert_cf(data)
+        yaml_bytes = _dump_simple(out)
+        if yaml_bytes is None:
+            yaml_bytes = yaml.dump(
                 out,
+                Dumper=SafeDumper,
                 default_flow_style=False,
                 allow_unicode=True,
                 sort_keys=False,
-                width=120,
+                width=YAML_WIDTH,
+                encoding="utf-8",
             )
-            yml_path.write_text(yaml_str, encoding="utf-8")
-            count += 1
-        except Exception as e:
-            print(f"Error converting {yml_path.name}: {e}", file=sys.stderr)
+        return yaml_bytes, None
+    except Exception as e:
+        return None, str(e)
+
+
+def main() -> None:
+    if not CUSTOM_FORMATS_DIR.is_dir():
+        print(f"Directory not found: {CUSTOM_FORMATS_DIR}", file=sys.stderr)
+        sys.exit(1)
+
+    paths = sorted(CUSTOM_FORMATS_DIR.glob("*.yml"))
+    count = 0
+    # Parse/convert/dump in worker processes; only the writes happen here
+    with ProcessPoolExecutor() as ex:
+        for yml_path, (yaml_bytes, error) in zip(paths, ex.map(convert_file, paths, chunksize=16)):
+            if error is None and yaml_bytes is not None:
+                try:
+                    _write_bytes(yml_path, yaml_bytes)
+                    count += 1
+                except Exception as e:
+                    error = str(e)
+            if error is not None:
+                print(f"Error converting {yml_path.name}: {error}", file=sys.stderr)
 
     print(f"Converted {count} custom format(s) to Dictionarry schema.")
 
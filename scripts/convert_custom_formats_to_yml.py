@@ -4,8 +4,10 @@ Convert TRaSH-style custom format JSON files to YAML.
 Reads from ops/custom_formats/*.json, writes to custom_formats/*.yml (repo root).
 Run from repository root.
 """
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import json
+import os
 import sys
 
 try:
@@ -14,34 +16,70 @@ except ImportError:
     print("PyYAML required: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 SRC_DIR = REPO_ROOT / "ops" / "custom_formats"
 OUT_DIR = REPO_ROOT / "custom_formats"
 
 
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Atomically replace path with data (written to a .tmp sibling, then renamed)."""
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def convert_file(json_path: Path) -> tuple[bytes | None, str | None]:
+    """Convert one JSON custom format to YAML.
+
+    Returns:
+        (yaml_bytes, error): yaml_bytes is None when conversion fails.
+    """
+    try:
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+        yaml_bytes = yaml.dump(
+            data,
+            Dumper=SafeDumper,
+            default_flow_style=False,
+            allow_unicode=True,
+            sort_keys=False,
+            width=120,
+            encoding="utf-8",
+        )
+        return yaml_bytes, None
+    except Exception as e:
+        return None, str(e)
+
+
 def main() -> None:
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     if not SRC_DIR.is_dir():
         print(f"Source directory not found: {SRC_DIR}", file=sys.stderr)
         sys.exit(1)
 
+    paths = sorted(SRC_DIR.glob("*.json"))
     count = 0
-    for json_path in sorted(SRC_DIR.glob("*.json")):
-        base_name = json_path.stem
-        yml_path = OUT_DIR / f"{base_name}.yml"
-        try:
-            data = json.loads(json_path.read_text(encoding="utf-8"))
-            yaml_str = yaml.dump(
-                data,
-                default_flow_style=False,
-                allow_unicode=True,
-                sort_keys=False,
-                width=120,
-            )
-            yml_path.write_text(yaml_str, encoding="utf-8")
-            count += 1
-        except Exception as e:
-            print(f"Error converting {json_path.name}: {e}", file=sys.stderr)
+    with ProcessPoolExecutor() as ex:
+        for json_path, (yaml_bytes, error) in zip(paths, ex.map(convert_file, paths, chunksize=16)):
+            if error is None:
+                yml_path = OUT_DIR / f"{json_path.stem}.yml"
+                try:
+                    _write_bytes(yml_path, yaml_bytes)
+                    count += 1
+                except Exception as e:
+                    error = str(e)
+            if error is not None:
+                print(f"Error converting {json_path.name}: {error}", file=sys.stderr)
 
     print(f"Converted {count} custom format(s) to {OUT_DIR}")
 
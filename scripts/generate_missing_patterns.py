@@ -5,11 +5,18 @@ Generate missing regex pattern files for Profilarr compatibility.
 Profilarr looks up patterns by exact match of the pattern string.
 This script extracts all patterns from custom_formats/*.yml and creates
 corresponding regex_patterns/*.yml files for any that are missing.
+Patterns read from custom formats are cached in
+$XDG_CACHE_HOME/astro-glide/patterns.json (default ~/.cache/...).
 
 Run from repository root:
     python3 scripts/generate_missing_patterns.py
 """
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import hashlib
+import json
+import os
 import re
 import sys
 
@@ -19,17 +26,170 @@ except ImportError:
     print("PyYAML required: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 CUSTOM_FORMATS_DIR = REPO_ROOT / "custom_formats"
 REGEX_PATTERNS_DIR = REPO_ROOT / "regex_patterns"
+CACHE_FILE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "astro-glide" / "patterns.json"
+CACHE_VERSION = 1
+
+_FS_TRANS = str.maketrans({c: "_" for c in '<>:"/\\|?*'})
+_RE_WS = re.compile(r'[\s_]+')
+
+YAML_WIDTH = 120
+_RE_SIMPLE_KEY = re.compile(r'[a-z_]+')
+# Characters the emitter writes as-is with allow_unicode (no line breaks)
+_RE_PRINTABLE = re.compile(r'[\x20-\x7e\xa0-\u2027\u202a-\ud7ff\ue000-\ufefe\uff00-\ufffd]*')
+
+_STR_TAG = "tag:yaml.org,2002:str"
+_RESOLVER = yaml.resolver.Resolver()
+_RE_DOC_MARKERS = re.compile(rb'(?m)^(?:---|\.\.\.|%)')
+_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+# Tags inferred from keywords in the condition name or pattern, in output order
+KEYWORD_TAGS = (
+    ("Audio", ("atmos", "dts", "truehd", "aac", "flac", "pcm", "dolby", "surround", "stereo", "mono", "sound", "audio")),
+    ("Video", ("hdr", "dv", "dolby vision", "hevc", "h265", "h264", "x264", "x265", "av1", "remux", "bluray", "webdl", "webrip")),
+    ("Streaming", ("netflix", "amazon", "amzn", "disney", "dsnp", "hbo", "hmax", "apple", "atvp", "hulu", "peacock", "paramount", "crunchyroll")),
+)
+
+
+def _build_keyword_automaton():
+    """Build one Aho-Corasick automaton over all KEYWORD_TAGS keywords (None without pyahocorasick)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for tag, keywords in KEYWORD_TAGS:
+        for kw in keywords:
+            automaton.add_word(kw, tag)
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+def _iter_yml(directory: Path) -> list[str]:
+    """Return the sorted paths of the *.yml files directly inside directory."""
+    with os.scandir(directory) as it:
+        return sorted(e.path for e in it if e.name.endswith(".yml") and e.is_file())
+
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Atomically replace path with data (written to a .tmp sibling, then renamed)."""
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def _is_simple_key(key) -> bool:
+    return (
+        type(key) is str
+        and _RE_SIMPLE_KEY.fullmatch(key) is not None
+        and _RESOLVER.resolve(yaml.ScalarNode, key, (True, False)) == _STR_TAG
+    )
+
+
+def _is_plain(value: str) -> bool:
+    """Whether the emitter would write value as a plain (unquoted) scalar."""
+    if _RESOLVER.resolve(yaml.ScalarNode, value, (True, False)) != _STR_TAG:
+        return False
+    if value[0] == " " or value[-1] == " " or value.startswith(("---", "...")):
+        return False
+    if value[0] in "#,[]{}&*!|>'\"%@`":
+        return False
+    if value[0] in "-?:" and (len(value) == 1 or value[1] == " "):
+        return False
+    return ": " not in value and " #" not in value and not value.endswith(":")
+
+
+def _yaml_scalar(value, column: int) -> str | None:
+    """Render value as the emitter would starting at column, or None if unsure."""
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "null"
+    if type(value) is int:
+        return str(value)
+    if type(value) is not str or _RE_PRINTABLE.fullmatch(value) is None:
+        return None
+    text = value if _is_plain(value) else "'" + value.replace("'", "''") + "'"
+    # Past the width the emitter may fold the line at a space
+    if column + len(text) > YAML_WIDTH and " " in text:
+        return None
+    return text
+
+
+def _dump_simple(data: dict) -> bytes | None:
+    """Emit data exactly as yaml.dump with this repo's options would.
+
+    Handles the fixed Dictionarry shapes only: a mapping whose values are
+    scalars, lists of scalars or lists of flat mappings. Returns None for
+    anything else so the caller can fall back to yaml.dump.
+    """
+    if type(data) is not dict or not data:
+        return None
+    lines = []
+    for key, value in data.items():
+        if not _is_simple_key(key):
+            return None
+        if type(value) is not list:
+            text = _yaml_scalar(value, len(key) + 2)
+            if text is None:
+                return None
+            lines.append(f"{key}: {text}")
+            continue
+        if not value:
+            lines.append(f"{key}: []")
+            continue
+        lines.append(f"{key}:")
+        for item in value:
+            if type(item) is not dict:
+                text = _yaml_scalar(item, 2)
+                if text is None:
+                    return None
+                lines.append(f"- {text}")
+                continue
+            if not item:
+                return None
+            prefix = "- "
+            for k, v in item.items():
+                text = _yaml_scalar(v, len(prefix) + len(k) + 2) if _is_simple_key(k) else None
+                if text is None:
+                    return None
+                lines.append(f"{prefix}{k}: {text}")
+                prefix = "  "
+    return ("\n".join(lines) + "\n").encode("utf-8")
 
 
 def sanitize_filename(name: str) -> str:
     """Convert a condition name to a valid filename."""
     # Replace problematic characters
-    name = re.sub(r'[<>:"/\\|?*]', '_', name)
+    name = name.translate(_FS_TRANS)
     # Replace multiple spaces/underscores with single underscore
-    name = re.sub(r'[\s_]+', ' ', name)
+    name = _RE_WS.sub(' ', name)
     # Trim whitespace
     name = name.strip()
     # Limit length
@@ -49,20 +209,17 @@ def infer_tags(condition_name: str, pattern: str, cf_name: str) -> list:
     if "release_group" in name_lower or pattern.startswith("^(") and pattern.endswith(")$"):
         tags.append("Release Group")
 
-    # Audio-related
-    audio_keywords = ["atmos", "dts", "truehd", "aac", "flac", "pcm", "dolby", "surround", "stereo", "mono", "sound", "audio"]
-    if any(kw in name_lower or kw in pattern_lower for kw in audio_keywords):
-        tags.append("Audio")
-
-    # Video-related
-    video_keywords = ["hdr", "dv", "dolby vision", "hevc", "h265", "h264", "x264", "x265", "av1", "remux", "bluray", "webdl", "webrip"]
-    if any(kw in name_lower or kw in pattern_lower for kw in video_keywords):
-        tags.append("Video")
-
-    # Streaming services
-    streaming = ["netflix", "amazon", "amzn", "disney", "dsnp", "hbo", "hmax", "apple", "atvp", "hulu", "peacock", "paramount", "crunchyroll"]
-    if any(kw in name_lower or kw in pattern_lower for kw in streaming):
-        tags.append("Streaming")
+    # Audio, video and streaming keywords: one pass over name and pattern
+    if _KEYWORD_AUTOMATON is not None:
+        # NUL separator keeps keywords from matching across the two strings
+        hits = {tag for _, tag in _KEYWORD_AUTOMATON.iter(name_lower + "\x00" + pattern_lower)}
+    else:
+        hits = {
+            tag
+            for tag, keywords in KEYWORD_TAGS
+            if any(kw in name_lower or kw in pattern_lower for kw in keywords)
+        }
+    tags.extend(tag for tag, _ in KEYWORD_TAGS if tag in hits)
 
     # Anime-specific
     if "anime" in cf_lower or any(kw in name_lower for kw in ["fansub", "dual audio", "uncensored", "raws"]):
@@ -75,6 +232,145 @@ def infer_tags(condition_name: str, pattern: str, cf_name: str) -> list:
     return tags
 
 
+# Fields read from each file; None means "keep the whole value"
+PATTERN_FIELDS = {"pattern": None}
+CF_FIELDS = {"name": None, "conditions": [{"name": None, "pattern": None, "type": None}]}
+
+_COLLECTION_TAGS = (None, "!", "tag:yaml.org,2002:map", "tag:yaml.org,2002:seq")
+_CONSTRUCTOR = yaml.constructor.SafeConstructor()
+
+
+class _UnsupportedYaml(Exception):
+    """A construct the event-stream reader leaves to a full yaml.load."""
+
+
+def _scalar_value(event: yaml.ScalarEvent):
+    """Resolve and construct a scalar the same way SafeLoader would."""
+    tag = event.tag
+    if tag is None or tag == "!":
+        tag = _RESOLVER.resolve(yaml.ScalarNode, event.value, event.implicit)
+    if tag == _STR_TAG:
+        return event.value
+    constructor = _CONSTRUCTOR.yaml_constructors.get(tag)
+    if constructor is None:
+        raise _UnsupportedYaml(tag)
+    return constructor(_CONSTRUCTOR, yaml.ScalarNode(tag, event.value, style=event.style))
+
+
+def _skip_node(event, events) -> None:
+    """Consume the rest of the node started by event without building it."""
+    depth = 0
+    while True:
+        if isinstance(event, yaml.AliasEvent) or getattr(event, "tag", None) not in _COLLECTION_TAGS:
+            raise _UnsupportedYaml(event)
+        if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            depth -= 1
+        if depth == 0:
+            return
+        event = next(events)
+
+
+def _build_node(event, events, fields):
+    """Build the node started by event, keeping only the given fields of mappings."""
+    if isinstance(event, yaml.ScalarEvent):
+        return _scalar_value(event)
+    if isinstance(event, yaml.AliasEvent) or event.tag not in _COLLECTION_TAGS:
+        raise _UnsupportedYaml(event)
+    if isinstance(event, yaml.SequenceStartEvent):
+        item_fields = fields[0] if isinstance(fields, list) else None
+        items = []
+        for event in events:
+            if isinstance(event, yaml.SequenceEndEvent):
+                return items
+            items.append(_build_node(event, events, item_fields))
+    keep = fields if isinstance(fields, dict) else None
+    mapping = {}
+    for event in events:
+        if isinstance(event, yaml.MappingEndEvent):
+            return mapping
+        if not isinstance(event, yaml.ScalarEvent):
+            raise _UnsupportedYaml("non-scalar key")
+        key = _scalar_value(event)
+        value_event = next(events)
+        if keep is None:
+            mapping[key] = _build_node(value_event, events, None)
+        elif key in keep:
+            mapping[key] = _build_node(value_event, events, keep[key])
+        else:
+            _skip_node(value_event, events)
+
+
+def load_fields(buf: bytes, fields: dict):
+    """Load a single YAML document, building only the requested top-level fields.
+
+    Walks the libyaml event stream and skips unwanted subtrees instead of
+    constructing them. Falls back to a full yaml.load for anchors/aliases,
+    merge keys and non-standard tags (returning the whole document), so the
+    kept fields always match what yaml.load would give.
+    """
+    try:
+        events = yaml.parse(buf, Loader=SafeLoader)
+        next(events)  # StreamStartEvent
+        if isinstance(next(events), yaml.StreamEndEvent):
+            return None
+        data = _build_node(next(events), events, fields)
+        next(events)  # DocumentEndEvent
+        if not isinstance(next(events), yaml.StreamEndEvent):
+            raise _UnsupportedYaml("multiple documents")
+        return data
+    except _UnsupportedYaml:
+        return yaml.load(buf, Loader=SafeLoader)
+
+
+def load_fields_all(bufs: list[bytes], fields: dict) -> list:
+    """Like load_fields for many files, parsed as one multi-document stream.
+
+    Each buffer becomes a "---" document so a single parser covers them all.
+    Raises if the files can't be told apart reliably (their own document
+    markers/directives, BOMs, a parse error, a document count mismatch) or
+    need a full yaml.load; callers then fall back to per-file loading.
+    """
+    chunks = []
+    for buf in bufs:
+        if _RE_DOC_MARKERS.search(buf) or buf.startswith(_BOMS) or b"\0" in buf:
+            raise _UnsupportedYaml("document markers")
+        chunks.append(b"---\n")
+        chunks.append(buf)
+        if not buf.endswith(b"\n"):
+            chunks.append(b"\n")
+    events = yaml.parse(b"".join(chunks), Loader=SafeLoader)
+    next(events)  # StreamStartEvent
+    docs = []
+    for event in events:
+        if isinstance(event, yaml.StreamEndEvent):
+            break
+        docs.append(_build_node(next(events), events, fields))
+        next(events)  # DocumentEndEvent
+    if len(docs) != len(bufs):
+        raise _UnsupportedYaml("document count")
+    return docs
+
+
+def _pattern_of(data) -> str | None:
+    try:
+        if data and "pattern" in data:
+            return data["pattern"]
+    except Exception:
+        pass
+    return None
+
+
+def read_pattern(path: str) -> str | None:
+    """Return the pattern string from a regex_patterns file, if any."""
+    try:
+        with open(path, "rb") as fh:
+            return _pattern_of(load_fields(fh.read(), PATTERN_FIELDS))
+    except Exception:
+        return None
+
+
 def load_existing_patterns() -> dict:
     """Load all existing patterns from regex_patterns directory.
     
@@ -85,18 +381,90 @@ def load_existing_patterns() -> dict:
     if not REGEX_PATTERNS_DIR.exists():
         return patterns
 
-    for f in REGEX_PATTERNS_DIR.glob("*.yml"):
-        try:
-            data = yaml.safe_load(f.read_text(encoding="utf-8"))
-            if data and "pattern" in data:
-                patterns[data["pattern"]] = f.stem
-        except Exception:
-            pass
+    paths = _iter_yml(REGEX_PATTERNS_DIR)
+    try:
+        bufs = []
+        for path in paths:
+            with open(path, "rb") as fh:
+                bufs.append(fh.read())
+        found = [_pattern_of(data) for data in load_fields_all(bufs, PATTERN_FIELDS)]
+    except Exception:
+        # Some file needs individual handling: parse each one on its own
+        with ProcessPoolExecutor() as ex:
+            found = list(ex.map(read_pattern, paths, chunksize=16))
+    for path, pattern in zip(paths, found):
+        if pattern is not None:
+            patterns[pattern] = os.path.splitext(os.path.basename(path))[0]
     return patterns
 
 
+def read_cf_conditions(buf: bytes) -> dict:
+    """Extract the name and condition patterns from one custom format file.
+
+    Returns:
+        dict with "conditions" (list of [pattern, name, type]) and, if the
+        file sets one, "name"
+    """
+    entry = {"conditions": []}
+    try:
+        data = load_fields(buf, CF_FIELDS)
+        if not isinstance(data, dict) or "conditions" not in data:
+            return entry
+
+        if "name" in data:
+            entry["name"] = data["name"]
+        append = entry["conditions"].append
+        for cond in data.get("conditions", []):
+            if "pattern" in cond:
+                append([
+                    cond["pattern"],
+                    cond.get("name", "Unknown"),
+                    cond.get("type", "release_title"),
+                ])
+    except Exception:
+        pass
+    return entry
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(buf: bytes):
+    if orjson is not None:
+        return orjson.loads(buf)
+    return json.loads(buf)
+
+
+def _load_cache() -> dict:
+    """Load the pattern cache, or return an empty one if missing/outdated."""
+    try:
+        with open(CACHE_FILE, "rb") as fh:
+            cache = _json_loads(fh.read())
+        if cache.get("version") == CACHE_VERSION:
+            return cache
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": CACHE_VERSION, "files": {}, "patterns": {}}
+
+
+def _save_cache(cache: dict) -> None:
+    """Write the pattern cache atomically; failures only cost the next run time."""
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _write_bytes(CACHE_FILE, _json_dumps(cache))
+    except OSError:
+        pass
+
+
 def extract_patterns_from_custom_formats() -> list:
     """Extract all patterns from custom format conditions.
+
+    Parsed results are cached by file content hash in CACHE_FILE, with the
+    file's mtime/size as a quick check, so unchanged (or byte-identical)
+    files are not parsed again.
     
     Returns:
         list of dicts with keys: pattern, name, cf_name, type
@@ -105,28 +473,67 @@ def extract_patterns_from_custom_formats() -> list:
     if not CUSTOM_FORMATS_DIR.exists():
         return patterns
 
-    for f in sorted(CUSTOM_FORMATS_DIR.glob("*.yml")):
+    paths = _iter_yml(CUSTOM_FORMATS_DIR)
+    cache = _load_cache()
+    files = cache["files"]
+    entries = cache["patterns"]
+    digests = {}
+    pending = {}
+    for path in paths:
+        st = os.stat(path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        cached = files.get(path)
+        if cached and cached[:2] == stamp and cached[2] in entries:
+            digests[path] = cached[2]
+            continue
+        with open(path, "rb") as fh:
+            buf = fh.read()
+        digest = hashlib.sha256(buf).hexdigest()
+        files[path] = stamp + [digest]
+        digests[path] = digest
+        if digest not in entries:
+            pending[digest] = buf
+
+    parsed = {}
+    if pending:
+        with ProcessPoolExecutor() as ex:
+            parsed = dict(zip(pending, ex.map(read_cf_conditions, pending.values(), chunksize=16)))
+
+    append = patterns.append
+    for path in paths:
+        digest = digests[path]
+        entry = entries[digest] if digest in entries else parsed[digest]
+        cf_name = entry.get("name", os.path.splitext(os.path.basename(path))[0])
+        for pattern, name, cond_type in entry["conditions"]:
+            append({
+                "pattern": pattern,
+                "name": name,
+                "cf_name": cf_name,
+                "type": cond_type,
+            })
+
+    # Only cache entries that survive a JSON round trip, for files that still exist
+    for digest, entry in parsed.items():
         try:
-            data = yaml.safe_load(f.read_text(encoding="utf-8"))
-            if not data or "conditions" not in data:
+            if _json_loads(_json_dumps(entry)) != entry:
                 continue
-
-            cf_name = data.get("name", f.stem)
-            for cond in data.get("conditions", []):
-                if "pattern" in cond:
-                    patterns.append({
-                        "pattern": cond["pattern"],
-                        "name": cond.get("name", "Unknown"),
-                        "cf_name": cf_name,
-                        "type": cond.get("type", "release_title"),
-                    })
-        except Exception:
-            pass
+        except (TypeError, ValueError):
+            continue
+        entries[digest] = entry
+    live = set(digests.values()) & entries.keys()
+    cache["files"] = {path: files[path] for path in paths if digests[path] in live}
+    cache["patterns"] = {digest: entries[digest] for digest in live}
+    _save_cache(cache)
     return patterns
 
 
-def generate_pattern_file(pattern: str, name: str, cf_name: str, existing_files: set) -> str | None:
+def generate_pattern_file(
+    pattern: str, name: str, cf_name: str, existing_files: set, base_counts: dict
+) -> str | None:
     """Generate a YAML file for a pattern.
+
+    existing_files holds every used filename (lowercased); base_counts maps a
+    lowercased base name to the last " (N)" counter handed out for it.
     
     Returns:
         The filename created, or None if skipped.
@@ -135,12 +542,16 @@ def generate_pattern_file(pattern: str, name: str, cf_name: str, existing_files:
     if not base_name:
         base_name = "pattern"
 
-    # Handle duplicate filenames
+    # Handle duplicate filenames: resume counting after the last suffix used
+    # for this base (filenames are never freed, so lower counters are taken)
     filename = base_name
-    counter = 1
-    while filename.lower() in existing_files or (REGEX_PATTERNS_DIR / f"{filename}.yml").exists():
+    base_key = base_name.lower()
+    if base_key in existing_files:
+        counter = base_counts[base_key] + 1
+        while f"{base_key} ({counter})" in existing_files:
+            counter += 1
+        base_counts[base_key] = counter
         filename = f"{base_name} ({counter})"
-        counter += 1
 
     existing_files.add(filename.lower())
 
@@ -158,14 +569,18 @@ def generate_pattern_file(pattern: str, name: str, cf_name: str, existing_files:
 
     # Write file
     filepath = REGEX_PATTERNS_DIR / f"{filename}.yml"
-    yaml_str = yaml.dump(
-        data,
-        default_flow_style=False,
-        allow_unicode=True,
-        sort_keys=False,
-        width=120,
-    )
-    filepath.write_text(yaml_str, encoding="utf-8")
+    yaml_bytes = _dump_simple(data)
+    if yaml_bytes is None:
+        yaml_bytes = yaml.dump(
+            data,
+            Dumper=SafeDumper,
+            default_flow_style=False,
+            allow_unicode=True,
+            sort_keys=False,
+            width=YAML_WIDTH,
+            encoding="utf-8",
+        )
+    _write_bytes(filepath, yaml_bytes)
 
     return filename
 
@@ -198,13 +613,14 @@ def main() -> None:
     REGEX_PATTERNS_DIR.mkdir(parents=True, exist_ok=True)
 
     # Track used filenames (case-insensitive for cross-platform compatibility)
-    existing_files = {f.stem.lower() for f in REGEX_PATTERNS_DIR.glob("*.yml")}
+    existing_files = {os.path.splitext(os.path.basename(p))[0].lower() for p in _iter_yml(REGEX_PATTERNS_DIR)}
+    base_counts = defaultdict(int)
 
     print(f"\nGenerating {len(missing_patterns)} pattern files...")
     created = 0
     for p in missing_patterns:
         filename = generate_pattern_file(
-            p["pattern"], p["name"], p["cf_name"], existing_files
+            p["pattern"], p["name"], p["cf_name"], existing_files, base_counts
         )
         if filename:
             created += 1
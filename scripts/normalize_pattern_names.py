@@ -10,6 +10,7 @@ Run from repository root:
     python3 scripts/normalize_pattern_names.py
 """
 from pathlib import Path
+import os
 import re
 import sys
 
@@ -19,9 +20,26 @@ except ImportError:
     print("PyYAML required: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 REGEX_PATTERNS_DIR = REPO_ROOT / "regex_patterns"
 
+_FS_TRANS = str.maketrans({c: "_" for c in '<>:"/\\|?*'})
+_RE_PAREN_SUFFIX = re.compile(r'\(\d+\)$')
+_RE_BASE = re.compile(r'^(.+?)\s*\(\d+\)$')
+_RE_AUTOGEN = re.compile(r'Auto-generated from (.+)$')
+_RE_NAME_LINE = re.compile(rb'(?m)^name:(?:[ \t]+([^\r\n]*))?(?=\r?$)')
+
+
+def _iter_yml(directory: Path) -> list[str]:
+    """Return the sorted paths of the *.yml files directly inside directory."""
+    with os.scandir(directory) as it:
+        return sorted(e.path for e in it if e.name.endswith(".yml") and e.is_file())
+
 
 def get_safe_filename(name: str) -> str:
     """Convert a name to a safe filename, handling problematic characters."""
@@ -30,7 +48,7 @@ def get_safe_filename(name: str) -> str:
         name = 'Hash' + name[1:]
     
     # Replace characters that are problematic for filesystems
-    name = re.sub(r'[<>:"/\\|?*]', '_', name)
+    name = name.translate(_FS_TRANS)
     
     # Trim and limit length
     name = name.strip()
@@ -40,10 +58,58 @@ def get_safe_filename(name: str) -> str:
     return name
 
 
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Atomically replace path with data (written to a .tmp sibling, then renamed)."""
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def find_name_line(buf: bytes) -> re.Match | None:
+    """Find the top-level `name:` line if it can be replaced in place.
+
+    Returns None unless there is exactly one such line and its value is a
+    complete single-line scalar (no block scalar or continuation lines).
+    """
+    matches = list(_RE_NAME_LINE.finditer(buf))
+    if len(matches) != 1:
+        return None
+    match = matches[0]
+    value = match.group(1)
+    if not value or value[:1] in b"|>&*!":
+        return None
+    if buf[match.end():].lstrip(b"\r\n")[:1] in (b" ", b"\t"):
+        return None
+    try:
+        line = yaml.load(match.group(0), Loader=SafeLoader)
+    except yaml.YAMLError:
+        return None
+    return match if isinstance(line, dict) else None
+
+
+def set_name_line(buf: bytes, match: re.Match, name: str) -> bytes:
+    """Replace the matched `name:` line with name, formatted as yaml.dump would."""
+    line = yaml.dump(
+        {"name": name},
+        Dumper=SafeDumper,
+        default_flow_style=False,
+        allow_unicode=True,
+        width=120,
+        encoding="utf-8",
+    )
+    return buf[:match.start()] + line.rstrip(b"\n") + buf[match.end():]
+
+
 def find_descriptive_name(pattern: str, current_name: str, description: str) -> str:
     """Find a more descriptive name for a pattern file with (N) suffix."""
     # Extract the base name without the (N) suffix
-    base_match = re.match(r'^(.+?)\s*\(\d+\)$', current_name)
+    base_match = _RE_BASE.match(current_name)
     if not base_match:
         return current_name
     
@@ -51,7 +117,7 @@ def find_descriptive_name(pattern: str, current_name: str, description: str) ->
     
     # Try to extract context from the description
     # Format is typically "Auto-generated from <CustomFormatName>"
-    cf_match = re.search(r'Auto-generated from (.+)$', description)
+    cf_match = _RE_AUTOGEN.search(description)
     if cf_match:
         cf_name = cf_match.group(1)
         # Create a unique name combining base name and source
@@ -71,16 +137,33 @@ def normalize_files():
     files_to_rename = []
     existing_names = set()
     
-    for f in sorted(REGEX_PATTERNS_DIR.glob("*.yml")):
-        existing_names.add(f.stem.lower())
-    
-    for f in sorted(REGEX_PATTERNS_DIR.glob("*.yml")):
+    # Single scan: record every name and look for renames in the same loop
+    for path in _iter_yml(REGEX_PATTERNS_DIR):
+        current_name = os.path.splitext(os.path.basename(path))[0]
+        existing_names.add(current_name.lower())
+
+        # Renames depend on the filename; only parse files that may need one
+        if current_name.startswith('#'):
+            # New name needs no file content: edit just the name line if we can
+            try:
+                with open(path, "rb") as fh:
+                    buf = fh.read()
+            except OSError as e:
+                print(f"Error processing {os.path.basename(path)}: {e}", file=sys.stderr)
+                continue
+            if find_name_line(buf) is not None:
+                files_to_rename.append((path, 'Hash' + current_name[1:], None, buf))
+                continue
+        elif not _RE_PAREN_SUFFIX.search(current_name):
+            continue
+
         try:
-            data = yaml.safe_load(f.read_text(encoding="utf-8"))
+            with open(path, "rb") as fh:
+                buf = fh.read()
+            data = yaml.load(buf, Loader=SafeLoader)
             if not data:
                 continue
             
-            current_name = f.stem
             description = data.get("description", "")
             pattern = data.get("pattern", "")
             
@@ -88,7 +171,7 @@ def normalize_files():
             needs_rename = False
             
             # Check for (N) suffix
-            if re.search(r'\(\d+\)$', current_name):
+            if _RE_PAREN_SUFFIX.search(current_name):
                 new_name = find_descriptive_name(pattern, current_name, description)
                 needs_rename = True
             
@@ -98,10 +181,10 @@ def normalize_files():
                 needs_rename = True
             
             if needs_rename and new_name != current_name:
-                files_to_rename.append((f, new_name, data))
+                files_to_rename.append((path, new_name, data, buf))
                 
         except Exception as e:
-            print(f"Error processing {f.name}: {e}", file=sys.stderr)
+            print(f"Error processing {os.path.basename(path)}: {e}", file=sys.stderr)
     
     print(f"Found {len(files_to_rename)} files to rename")
     
@@ -109,43 +192,48 @@ def normalize_files():
     renamed = 0
     used_names = set(existing_names)
     
-    for old_path, new_name, data in files_to_rename:
+    for old_path, new_name, data, buf in files_to_rename:
+        old_stem = os.path.splitext(os.path.basename(old_path))[0]
         # Ensure unique filename
         final_name = new_name
         counter = 1
-        while final_name.lower() in used_names and final_name.lower() != old_path.stem.lower():
+        while final_name.lower() in used_names and final_name.lower() != old_stem.lower():
             # If conflict, try adding a counter
             final_name = f"{new_name} {counter}"
             counter += 1
         
-        if final_name.lower() == old_path.stem.lower():
+        if final_name.lower() == old_stem.lower():
             # No actual rename needed
             continue
         
         new_path = REGEX_PATTERNS_DIR / f"{final_name}.yml"
         
-        # Update the name field in the data
-        data["name"] = final_name
-        
-        # Write to new file
-        yaml_str = yaml.dump(
-            data,
-            default_flow_style=False,
-            allow_unicode=True,
-            sort_keys=False,
-            width=120,
-        )
-        new_path.write_text(yaml_str, encoding="utf-8")
+        # Update the name field in place; re-dump only if the name line is unusual
+        match = find_name_line(buf)
+        if match is not None:
+            yaml_bytes = set_name_line(buf, match, final_name)
+        else:
+            data["name"] = final_name
+            yaml_bytes = yaml.dump(
+                data,
+                Dumper=SafeDumper,
+                default_flow_style=False,
+                allow_unicode=True,
+                sort_keys=False,
+                width=120,
+                encoding="utf-8",
+            )
         
-        # Remove old file
-        old_path.unlink()
+        # Write to new file, then remove the old one
+        _write_bytes(new_path, yaml_bytes)
+        os.remove(old_path)
         
         # Update tracking
-        used_names.discard(old_path.stem.lower())
+        used_names.discard(old_stem.lower())
         used_names.add(final_name.lower())
         
         renamed += 1
-        print(f"  Renamed: {old_path.name} -> {new_path.name}")
+        print(f"  Renamed: {os.path.basename(old_path)} -> {new_path.name}")
     
     print(f"\nRenamed {renamed} files")
     return renamed
@@ -6,6 +6,7 @@ optionally warns on case-only differences.
 Run from repository root. Exits 0 if all references are valid.
 """
 from pathlib import Path
+import os
 import sys
 
 try:
@@ -14,20 +15,32 @@ except ImportError:
     print("PyYAML required: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 CUSTOM_FORMATS_DIR = REPO_ROOT / "custom_formats"
 PROFILES_DIR = REPO_ROOT / "profiles"
 CF_KEYS = ("custom_formats", "custom_formats_radarr", "custom_formats_sonarr")
 
 
+def _iter_yml(directory: Path) -> list[str]:
+    """Return the sorted paths of the *.yml files directly inside directory."""
+    with os.scandir(directory) as it:
+        return sorted(e.path for e in it if e.name.endswith(".yml") and e.is_file())
+
+
 def get_custom_format_names() -> set[str]:
     """Collect top-level 'name' from every custom_formats/*.yml."""
     names = set()
     if not CUSTOM_FORMATS_DIR.is_dir():
         return names
-    for path in CUSTOM_FORMATS_DIR.glob("*.yml"):
+    for path in _iter_yml(CUSTOM_FORMATS_DIR):
         try:
-            data = yaml.safe_load(path.read_text(encoding="utf-8"))
+            with open(path, "rb") as fh:
+                data = yaml.load(fh.read(), Loader=SafeLoader)
             if isinstance(data, dict) and "name" in data:
                 names.add(data["name"])
         except Exception as e:
@@ -35,14 +48,16 @@ def get_custom_format_names() -> set[str]:
     return names
 
 
-def get_profile_references() -> list[tuple[Path, str, str]]:
+def get_profile_references() -> list[tuple[str, str, str]]:
     """Yield (profile_path, cf_key, name) for each custom format reference in profiles."""
     if not PROFILES_DIR.is_dir():
         return []
     refs = []
-    for path in PROFILES_DIR.glob("*.yml"):
+    append = refs.append
+    for path in _iter_yml(PROFILES_DIR):
         try:
-            data = yaml.safe_load(path.read_text(encoding="utf-8"))
+            with open(path, "rb") as fh:
+                data = yaml.load(fh.read(), Loader=SafeLoader)
         except Exception as e:
             print(f"{path}: {e}", file=sys.stderr)
             continue
@@ -53,13 +68,16 @@ def get_profile_references() -> list[tuple[Path, str, str]]:
             if not isinstance(entries, list):
                 continue
             for entry in entries:
-                if isinstance(entry, dict) and "name" in entry:
-                    refs.append((path, key, entry["name"]))
+                # Only mappings with a "name" key are references
+                try:
+                    append((path, key, entry["name"]))
+                except (KeyError, TypeError):
+                    continue
     return refs
 
 
 def main() -> None:
-    cf_names = get_custom_format_names()
+    cf_names = frozenset(get_custom_format_names())
     cf_names_lower = {n.lower(): n for n in cf_names}
     refs = get_profile_references()
     missing = []
@@ -67,8 +85,9 @@ def main() -> None:
     for path, key, name in refs:
         if name in cf_names:
             continue
-        if name.lower() in cf_names_lower:
-            case_warnings.append((path, key, name, cf_names_lower[name.lower()]))
+        canonical = cf_names_lower.get(name.lower())
+        if canonical is not None:
+            case_warnings.append((path, key, name, canonical))
         else:
             missing.append((path, key, name))
     ok = True
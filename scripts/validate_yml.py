@@ -3,7 +3,10 @@
 Validate YAML syntax of custom_formats/*.yml and profiles/*.yml.
 Run from repository root. Exits 0 if all load successfully.
 """
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import os
+import re
 import sys
 
 try:
@@ -12,25 +15,89 @@ except ImportError:
     print("PyYAML required: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 
+_RE_DOC_MARKERS = re.compile(rb'(?m)^(?:---|\.\.\.|%)')
+_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+
+def _iter_yml(directory: Path) -> list[str]:
+    """Return the sorted paths of the *.yml files directly inside directory."""
+    with os.scandir(directory) as it:
+        return sorted(e.path for e in it if e.name.endswith(".yml") and e.is_file())
+
+
+def validate_file(path: str) -> str | None:
+    """Return the parse error for path, or None if it loads cleanly."""
+    try:
+        with open(path, "rb") as fh:
+            yaml.load(fh.read(), Loader=SafeLoader)
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def validate_stream(bufs: list[bytes]) -> bool:
+    """Load bufs as one multi-document stream; True if every document loads.
+
+    Sharing one parser across a directory avoids per-file loader setup.
+    Callers re-check files one by one on failure to get exact error messages.
+    """
+    chunks = []
+    for buf in bufs:
+        chunks.append(b"---\n")
+        chunks.append(buf)
+        if not buf.endswith(b"\n"):
+            chunks.append(b"\n")
+    try:
+        count = sum(1 for _ in yaml.load_all(b"".join(chunks), Loader=SafeLoader))
+    except Exception:
+        return False
+    return count == len(bufs)
+
 
 def main() -> None:
     dirs = [
         REPO_ROOT / "custom_formats",
         REPO_ROOT / "profiles",
     ]
-    ok = True
+    paths = []
+    single = []
     for d in dirs:
         if not d.is_dir():
             continue
-        for path in d.glob("*.yml"):
-            try:
-                yaml.safe_load(path.read_text(encoding="utf-8"))
-            except Exception as e:
-                print(f"{path}: {e}", file=sys.stderr)
-                ok = False
-    if not ok:
+        dir_paths = _iter_yml(d)
+        paths.extend(dir_paths)
+        batch = []
+        bufs = []
+        for path in dir_paths:
+            with open(path, "rb") as fh:
+                buf = fh.read()
+            # Files with their own document markers/directives or a non-UTF-8
+            # encoding can't be safely concatenated; check those on their own
+            if _RE_DOC_MARKERS.search(buf) or buf.startswith(_BOMS) or b"\0" in buf:
+                single.append(path)
+            else:
+                batch.append(path)
+                bufs.append(buf)
+        if batch and not validate_stream(bufs):
+            single.extend(batch)
+
+    errors = {}
+    if single:
+        with ProcessPoolExecutor() as ex:
+            for path, error in zip(single, ex.map(validate_file, single, chunksize=16)):
+                if error is not None:
+                    errors[path] = error
+    for path in paths:
+        if path in errors:
+            print(f"{path}: {errors[path]}", file=sys.stderr)
+    if errors:
         sys.exit(1)
     print("All YAML files valid.")
 